@@ -2,6 +2,7 @@
 English Learning Application - Streamlit Interface
 """
 
+import concurrent.futures
 import streamlit as st
 import json
 from typing import List, Dict, Any, Optional
@@ -12,17 +13,33 @@ from core.user_manager import (
     save_user_preferences, load_user_preferences
 )
 from core.word_bank import (
-    load_words, save_words, deduplicate_words, add_words, get_word_count
+    load_words, save_words, add_words, get_word_count, parse_words
 )
 from core.ai_client import get_client, load_api_config, save_api_config, fetch_available_models
 from core.content_generator import generate_article_and_questions
 from core.evaluator import evaluate_answers, save_test_log, save_article_log
-from core.log_manager import get_user_logs, format_log_for_display, get_score_history
+from core.log_manager import (
+    get_user_log_summaries, load_log, format_log_for_display, get_score_history
+)
 from core.global_config import load_global_api_config, get_model_base_url
 from core.document_exporter import create_article_document, create_article_with_answers_document
 from datetime import datetime
 
 
+@st.cache_resource
+def get_io_pool() -> concurrent.futures.ThreadPoolExecutor:
+    """
+    Get the thread pool used to overlap independent disk reads.
+
+    Streamlit re-executes this script on every rerun, so the pool is created
+    once per server process and shared by all sessions.
+
+    Returns:
+        Shared thread pool executor
+    """
+    return concurrent.futures.ThreadPoolExecutor(max_workers=8)
+
+
 def init_session_state():
     """Initialize session state variables."""
     if 'current_user' not in st.session_state:
@@ -85,17 +102,23 @@ def load_user_data(username):
 
     st.session_state.current_user = username
 
+    # The three file reads are independent, so overlap them
+    io_pool = get_io_pool()
+    f_info = io_pool.submit(load_user_info, username)
+    f_words = io_pool.submit(load_words, username)
+    f_prefs = io_pool.submit(load_user_preferences, username)
+
     # Load user info
-    info = load_user_info(username)
+    info = f_info.result()
     st.session_state.user_age = info.get('age', DEFAULT_AGE) if info else DEFAULT_AGE
     st.session_state.user_lexile = info.get('lexile_level', DEFAULT_LEXILE) if info else DEFAULT_LEXILE
 
     # Load word bank
-    words = load_words(username)
+    words = f_words.result()
     st.session_state.word_bank_text = "\n".join(words)
 
     # Load user preferences (last selected provider and model)
-    prefs = load_user_preferences(username)
+    prefs = f_prefs.result()
     if prefs:
         st.session_state.selected_provider = prefs.get('provider')
         st.session_state.selected_model = prefs.get('model')
@@ -224,11 +247,7 @@ def main():
                     st.session_state.user_lexile = int(lexile)
 
                     # Save words
-                    if st.session_state.word_bank_text:
-                        words = [w.strip() for w in st.session_state.word_bank_text.split('\n') if w.strip()]
-                        save_words(st.session_state.current_user, words)
-                    else:
-                        save_words(st.session_state.current_user, [])
+                    save_words(st.session_state.current_user, parse_words(st.session_state.word_bank_text))
 
                     word_count = get_word_count(st.session_state.current_user)
                     st.success(f"✓ 已保存用户配置 / Saved profile for {st.session_state.current_user} ({word_count} words in bank)")
@@ -260,14 +279,13 @@ def main():
                 if not st.session_state.current_user:
                     st.error("Please select a user first")
                 else:
-                    # First save current text area content to file
-                    words = [w.strip() for w in word_bank.split('\n') if w.strip()]
+                    # Saving the text area content drops duplicates
+                    words = parse_words(word_bank)
                     save_words(st.session_state.current_user, words)
-                    # Then deduplicate
-                    removed = deduplicate_words(st.session_state.current_user)
                     # Reload the deduplicated words
-                    words = load_words(st.session_state.current_user)
-                    st.session_state.word_bank_text = "\n".join(words)
+                    saved_words = load_words(st.session_state.current_user)
+                    removed = len(words) - len(saved_words)
+                    st.session_state.word_bank_text = "\n".join(saved_words)
                     st.session_state.word_bank_key += 1
                     st.success(f"✓ Removed {removed} duplicate words")
                     st.rerun()
@@ -536,21 +554,15 @@ def main():
             if not st.session_state.current_user:
                 st.error("Please select a user first")
             else:
-                logs = get_user_logs(st.session_state.current_user)
+                # Summaries come from the history index; full logs are loaded on selection
+                summaries = get_user_log_summaries(st.session_state.current_user)
 
-                if not logs:
+                if not summaries:
                     st.warning("No test history found")
                     st.session_state.log_list = []
                 else:
-                    # Create list of log summaries
-                    log_choices = []
-                    for log in logs:
-                        timestamp = log.get('timestamp', 'Unknown')
-                        score = log.get('score', 'N/A')
-                        log_choices.append(f"{timestamp} - Score: {score}/100")
-
-                    st.session_state.log_list = logs
-                    st.success(f"Found {len(logs)} test records")
+                    st.session_state.log_list = summaries
+                    st.success(f"Found {len(summaries)} test records")
 
         if st.session_state.log_list:
             # Create radio options
@@ -579,8 +591,14 @@ def main():
                 selected_log_data = None
                 for i, log_option in enumerate(log_options):
                     if log_option == selected_log:
-                        selected_log_data = st.session_state.log_list[i]
-                        st.markdown(format_log_for_display(selected_log_data))
+                        selected_log_data = load_log(
+                            st.session_state.current_user,
+                            st.session_state.log_list[i]['path']
+                        )
+                        if selected_log_data:
+                            st.markdown(format_log_for_display(selected_log_data))
+                        else:
+                            st.error("Log not found")
                         break
 
                 # Add download button for the selected log
@@ -2,6 +2,9 @@
 English Learning Application - Main Gradio Interface
 """
 
+import asyncio
+import concurrent.futures
+import time
 import gradio as gr
 import json
 from typing import List, Dict, Any, Optional
@@ -11,22 +14,35 @@ from core.user_manager import (
     list_users, create_user, load_user_info, save_user_info, user_exists
 )
 from core.word_bank import (
-    load_words, save_words, deduplicate_words, add_words, get_word_count
+    load_words, save_words, deduplicate_words, add_words, get_word_count, parse_words
 )
 from core.ai_client import get_client, load_api_config, save_api_config
-from core.content_generator import generate_article_and_questions
-from core.evaluator import evaluate_answers, save_test_log
-from core.log_manager import get_user_logs, format_log_for_display, get_score_history
+from core.content_generator import (
+    agenerate_article_and_questions, parse_json_response, validate_article_response,
+    extract_partial_article
+)
+from core.evaluator import aevaluate_answers, save_test_log
+from core.log_manager import (
+    get_user_log_summaries, load_log, format_log_for_display, get_score_history
+)
 from core.global_config import load_global_api_config, get_model_base_url
+from prompts.article_generation import get_article_generation_prompt
 
 
 # Global state
 current_user = None
 current_article = None
 current_questions = None
-current_client = None
+current_provider = None  # Provider and model that generated the current questions; used to grade them
+current_model = None
 global_api_config = None  # Will be loaded at startup
 
+# Shared pool for overlapping independent disk reads in event handlers
+_IO_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+
+# Minimum seconds between streamed UI updates; more frequent re-renders slow the page down
+STREAM_UPDATE_INTERVAL = 0.05
+
 
 def get_api_config_display():
     """Generate API configuration display text."""
@@ -54,7 +70,12 @@ def refresh_user_list():
     return gr.Dropdown(choices=users, value=users[0] if users else None)
 
 
-def handle_user_selection(username):
+def refresh_user_choices():
+    """Refresh dropdown choices while keeping the current selection."""
+    return gr.update(choices=list_users())
+
+
+async def handle_user_selection(username):
     """Handle existing user selection."""
     global current_user
 
@@ -63,13 +84,17 @@ def handle_user_selection(username):
 
     current_user = username
 
-    # Load existing user
-    info = load_user_info(username)
+    # Load existing user; the file reads are independent, so overlap them
+    loop = asyncio.get_running_loop()
+    info, words = await asyncio.gather(
+        loop.run_in_executor(_IO_POOL, load_user_info, username),
+        loop.run_in_executor(_IO_POOL, load_words, username)
+    )
     age = info.get('age', DEFAULT_AGE) if info else DEFAULT_AGE
     lexile = info.get('lexile_level', DEFAULT_LEXILE) if info else DEFAULT_LEXILE
 
-    word_count = get_word_count(username)
-    words_text = "\n".join(load_words(username))
+    word_count = len(words)
+    words_text = "\n".join(words)
 
     return (
         f"✓ 已加载用户 / Loaded user: {username} ({word_count} words)",
@@ -105,6 +130,15 @@ def handle_create_user(new_username):
     )
 
 
+def _safe_int(value, default):
+    """Convert a form value to int, falling back to default for empty or non-numeric input."""
+    if isinstance(value, (int, float)):
+        return int(value) if value else default
+
+    value = str(value or "").strip()
+    return int(value) if value.isdigit() else default
+
+
 def save_user_profile(username, age, lexile, words_text):
     """Save user profile information."""
     if not username or username.strip() == "":
@@ -114,16 +148,12 @@ def save_user_profile(username, age, lexile, words_text):
         username = username.strip()
 
         # Save user info
-        age_int = int(age) if age else DEFAULT_AGE
-        lexile_int = int(lexile) if lexile else DEFAULT_LEXILE
+        age_int = _safe_int(age, DEFAULT_AGE)
+        lexile_int = _safe_int(lexile, DEFAULT_LEXILE)
         save_user_info(username, age_int, lexile_int)
 
         # Save words
-        if words_text:
-            words = [w.strip() for w in words_text.split('\n') if w.strip()]
-            save_words(username, words)
-        else:
-            save_words(username, [])
+        save_words(username, parse_words(words_text))
 
         word_count = get_word_count(username)
         return f"✓ 已保存用户配置 / Saved profile for {username} ({word_count} words in bank)"
@@ -166,79 +196,114 @@ def update_model_choices(provider):
     return gr.update(choices=[])
 
 
-def generate_content(username, provider, model):
+def get_provider_client(provider, model):
+    """Get the (cached) AI client for a provider section and model."""
+    provider_config = global_api_config[provider]
+    base_url = get_model_base_url(global_api_config, provider, model)
+
+    return get_client(
+        provider_config.get('provider_type', provider), model, provider_config['api_key'], base_url
+    )
+
+
+async def generate_content(username, provider, model):
     """Generate article and questions."""
-    global current_article, current_questions, current_client, global_api_config
+    global current_article, current_questions, current_provider, current_model, global_api_config
 
     if not username:
-        return "⚠️ 请先选择用户 / Please select a user first", "", gr.update(visible=False), None, None, None, None, None
+        yield "⚠️ 请先选择用户 / Please select a user first", "", gr.update(visible=False), None
+        return
 
     if not provider or not model:
-        return "⚠️ 请选择AI提供商和模型 / Please select AI provider and model", "", gr.update(visible=False), None, None, None, None, None
+        yield "⚠️ 请选择AI提供商和模型 / Please select AI provider and model", "", gr.update(visible=False), None
+        return
 
     try:
         # Load user info and words
         info = load_user_info(username)
         if not info:
-            return "⚠️ 请先保存用户配置 / Please save user profile first", "", gr.update(visible=False), None, None, None, None, None
+            yield "⚠️ 请先保存用户配置 / Please save user profile first", "", gr.update(visible=False), None
+            return
 
         words = load_words(username)
 
         # Get API key from global config
         if not global_api_config or provider not in global_api_config:
-            return f"✗ 未找到 {provider} 的API配置 / API config not found for {provider}", "", gr.update(visible=False), None, None, None, None, None
+            yield f"✗ 未找到 {provider} 的API配置 / API config not found for {provider}", "", gr.update(visible=False), None
+            return
 
         if 'api_key' not in global_api_config[provider]:
-            return f"✗ 未找到 {provider} 的API密钥 / API key not found for {provider}", "", gr.update(visible=False), None, None, None, None, None
-
-        api_key = global_api_config[provider]['api_key']
-
-        # Get base URL if exists
-        base_url = get_model_base_url(global_api_config, provider, model)
-
-        # Create AI client
-        current_client = get_client(provider, model, api_key, base_url)
-
-        # Generate content
-        result = generate_article_and_questions(
-            words, info['age'], info['lexile_level'], current_client
-        )
+            yield f"✗ 未找到 {provider} 的API密钥 / API key not found for {provider}", "", gr.update(visible=False), None
+            return
+
+        client = get_provider_client(provider, model)
+        system_prompt, user_prompt = get_article_generation_prompt(words, info['age'], info['lexile_level'])
+
+        # Stream the article text (not the raw JSON) into the article box, re-rendering at most once per interval
+        chunks = []
+        last_update = time.monotonic()
+        result = None
+        try:
+            async for chunk in client.astream_generate(user_prompt, system_prompt):
+                chunks.append(chunk)
+                now = time.monotonic()
+                if now - last_update >= STREAM_UPDATE_INTERVAL:
+                    last_update = now
+                    article_so_far = extract_partial_article("".join(chunks))
+                    yield "⏳ 正在生成... / Generating...", article_so_far, gr.update(visible=False), None
+
+            data = parse_json_response("".join(chunks))
+            if validate_article_response(data):
+                result = data
+        except Exception as e:
+            print(f"Streaming attempt failed: {str(e)}")
+
+        # Fall back to the regular retry path if the streamed reply was unusable
+        if not result:
+            result = await agenerate_article_and_questions(
+                words, info['age'], info['lexile_level'], client, max_retries=2
+            )
 
         if not result:
-            return "✗ Failed to generate content", "", gr.update(visible=False), None, None, None
+            yield "✗ Failed to generate content", "", gr.update(visible=False), None
+            return
 
         current_article = result['article']
         current_questions = result['questions']
+        current_provider, current_model = provider, model
 
-        # Build question UI components
-        question_components = []
-        for i, q in enumerate(current_questions):
-            question_components.append(f"**Question {i+1}** ({q['type']})\n\n{q['question']}")
+        # Build one (question, answer) row per question
+        question_rows = [
+            [f"**Question {i+1}** ({q['type']})\n\n{q['question']}", ""]
+            for i, q in enumerate(current_questions)
+        ]
 
         word_info = f"({len(words)} words used)" if words else "(no word bank, difficulty based on Lexile {info['lexile_level']})"
-        return (
+        yield (
             f"✓ 内容生成成功！/ Content generated successfully! {word_info}",
             current_article,
             gr.update(visible=True),
-            *question_components
+            question_rows
         )
 
     except Exception as e:
-        return f"✗ 错误 / Error: {str(e)}", "", gr.update(visible=False), None, None, None, None, None
+        yield f"✗ 错误 / Error: {str(e)}", "", gr.update(visible=False), None
 
 
-def submit_answers(username, ans1, ans2, ans3, ans4, ans5):
+async def submit_answers(username, answers_table):
     """Submit and evaluate answers."""
-    global current_article, current_questions, current_client
+    global current_article, current_questions, current_provider, current_model
 
-    if not current_questions or not current_client:
+    if not current_questions or not current_provider or not current_model:
         return "Please generate content first", ""
 
     try:
-        user_answers = [ans1, ans2, ans3, ans4, ans5]
+        user_answers = [row[1] or "" for row in answers_table]
 
         # Evaluate answers
-        evaluation = evaluate_answers(current_questions, user_answers, current_client)
+        evaluation = await aevaluate_answers(
+            current_questions, user_answers, get_provider_client(current_provider, current_model)
+        )
 
         if not evaluation:
             return "✗ Failed to evaluate answers", ""
@@ -247,16 +312,16 @@ def submit_answers(username, ans1, ans2, ans3, ans4, ans5):
         save_test_log(username, current_article, current_questions, user_answers, evaluation)
 
         # Format results
-        result_text = f"# Test Results\n\n**Score: {evaluation['score']}/100**\n\n"
-        result_text += f"## Item Analysis\n\n"
+        parts = [f"# Test Results\n\n**Score: {evaluation['score']}/100**\n\n## Item Analysis\n\n"]
 
         for i, analysis in enumerate(evaluation['item_analysis'], 1):
             correct = analysis.get('correct', False)
             status = "✓" if correct else "✗"
-            result_text += f"{status} **Question {i}**: {analysis.get('feedback', 'N/A')}\n\n"
+            parts.append(f"{status} **Question {i}**: {analysis.get('feedback', 'N/A')}\n\n")
 
-        result_text += f"## Overall Feedback\n\n{evaluation['overall_feedback']}\n\n"
-        result_text += f"## Suggestions\n\n{evaluation['suggestions']}"
+        parts.append(f"## Overall Feedback\n\n{evaluation['overall_feedback']}\n\n")
+        parts.append(f"## Suggestions\n\n{evaluation['suggestions']}")
+        result_text = "".join(parts)
 
         return "✓ Answers submitted and evaluated!", result_text
 
@@ -267,21 +332,21 @@ def submit_answers(username, ans1, ans2, ans3, ans4, ans5):
 def load_history(username):
     """Load test history for user."""
     if not username:
-        return "Please select a user first", []
+        return "Please select a user first", gr.update(choices=[])
 
-    logs = get_user_logs(username)
+    summaries = get_user_log_summaries(username)
 
-    if not logs:
-        return "No test history found", []
+    if not summaries:
+        return "No test history found", gr.update(choices=[])
 
-    # Create list of log summaries
+    # Label each entry with its summary; the value is the log path used to load it
     log_choices = []
-    for log in logs:
-        timestamp = log.get('timestamp', 'Unknown')
-        score = log.get('score', 'N/A')
-        log_choices.append(f"{timestamp} - Score: {score}/100")
+    for summary in summaries:
+        timestamp = summary.get('timestamp') or 'Unknown'
+        score = summary.get('score')
+        log_choices.append((f"{timestamp} - Score: {score if score is not None else 'N/A'}/100", summary['path']))
 
-    return f"Found {len(logs)} test records", log_choices
+    return f"Found {len(summaries)} test records", gr.update(choices=log_choices, value=None)
 
 
 def display_log_detail(username, selected_log):
@@ -289,18 +354,12 @@ def display_log_detail(username, selected_log):
     if not username or not selected_log:
         return "Please select a log entry"
 
-    logs = get_user_logs(username)
-
-    # Find the selected log by timestamp
-    for log in logs:
-        timestamp = log.get('timestamp', 'Unknown')
-        score = log.get('score', 'N/A')
-        log_label = f"{timestamp} - Score: {score}/100"
+    log = load_log(username, selected_log)
 
-        if log_label == selected_log:
-            return format_log_for_display(log)
+    if not log:
+        return "Log not found"
 
-    return "Log not found"
+    return format_log_for_display(log)
 
 
 def init_global_config():
@@ -337,7 +396,7 @@ with gr.Blocks(title="English Learning System", theme=gr.themes.Soft()) as app:
                 with gr.Column():
                     gr.Markdown("### 📋 选择已有用户 / Select Existing User")
                     user_dropdown = gr.Dropdown(
-                        choices=list_users(),
+                        choices=[],
                         label="选择用户 / Select User",
                         interactive=True
                     )
@@ -406,20 +465,16 @@ with gr.Blocks(title="English Learning System", theme=gr.themes.Soft()) as app:
             with gr.Column(visible=False) as questions_section:
                 gr.Markdown("## Questions")
 
-                q1_text = gr.Markdown()
-                a1_input = gr.Textbox(label="Your Answer", placeholder="Enter your answer")
-
-                q2_text = gr.Markdown()
-                a2_input = gr.Textbox(label="Your Answer", placeholder="Enter your answer")
-
-                q3_text = gr.Markdown()
-                a3_input = gr.Textbox(label="Your Answer", placeholder="Enter your answer")
-
-                q4_text = gr.Markdown()
-                a4_input = gr.Textbox(label="Your Answer", placeholder="Enter your answer")
-
-                q5_text = gr.Markdown()
-                a5_input = gr.Textbox(label="Your Answer", placeholder="Enter your answer")
+                qa_table = gr.Dataframe(
+                    headers=["Question", "Your Answer"],
+                    datatype=["markdown", "str"],
+                    row_count=5,
+                    column_count=2,
+                    static_columns=[0],
+                    type="array",
+                    interactive=True,
+                    wrap=True
+                )
 
                 submit_btn = gr.Button("📝 Submit Answers", variant="primary")
 
@@ -437,8 +492,9 @@ with gr.Blocks(title="English Learning System", theme=gr.themes.Soft()) as app:
 
     # Event handlers
     refresh_btn.click(
-        fn=lambda: gr.update(choices=list_users()),
-        outputs=user_dropdown
+        fn=refresh_user_choices,
+        outputs=user_dropdown,
+        show_progress="hidden"
     )
 
     create_user_btn.click(
@@ -474,20 +530,22 @@ with gr.Blocks(title="English Learning System", theme=gr.themes.Soft()) as app:
     generate_btn.click(
         fn=generate_content,
         inputs=[user_dropdown, provider_dropdown, model_dropdown],
-        outputs=[gen_status, article_box, questions_section, q1_text, q2_text, q3_text, q4_text, q5_text]
+        outputs=[gen_status, article_box, questions_section, qa_table]
     )
 
     submit_btn.click(
         fn=submit_answers,
-        inputs=[user_dropdown, a1_input, a2_input, a3_input, a4_input, a5_input],
+        inputs=[user_dropdown, qa_table],
         outputs=[submit_status, results_box]
     )
 
-    # History tab
+    # History tab: mirror the selected user in the browser, no server round trip
     user_dropdown.change(
-        fn=lambda x: x,
+        fn=None,
         inputs=user_dropdown,
-        outputs=history_user
+        outputs=history_user,
+        js="(x) => x",
+        show_progress="hidden"
     )
 
     load_history_btn.click(
@@ -508,6 +566,9 @@ with gr.Blocks(title="English Learning System", theme=gr.themes.Soft()) as app:
         outputs=[api_status, provider_dropdown, model_dropdown]
     )
 
+    # Populate the user list on page load rather than at import time
+    app.load(fn=refresh_user_choices, outputs=user_dropdown, show_progress="hidden")
+
 
 if __name__ == "__main__":
     app.launch(server_name="0.0.0.0", server_port=7860)
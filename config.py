@@ -19,6 +19,7 @@ USER_INFO_FILE = "user_info.txt"
 API_KEY_FILE = "api_key.txt"
 WORD_BANK_FILE = "word_bank.txt"
 LOG_DIR = "log"
+LOG_INDEX_FILE = "index.jsonl"
 
 # Default values
 DEFAULT_AGE = 12
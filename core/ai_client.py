@@ -2,14 +2,24 @@
 AI client adapter module providing unified interface for multiple AI providers.
 """
 
-import json
+import asyncio
+import functools
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, AsyncIterator, Union
 import anthropic
+import httpx
 import openai
+import orjson
 from dashscope import Generation
 
 
+# Shared HTTP/2 connection pools for all Anthropic/OpenAI SDK clients in this process;
+# the SDKs still set their own per-request timeouts
+_HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+_HTTP2_CLIENT = httpx.Client(http2=True, limits=_HTTP_LIMITS)
+_ASYNC_HTTP2_CLIENT = httpx.AsyncClient(http2=True, limits=_HTTP_LIMITS)
+
+
 class AIClient(ABC):
     """Base class for AI clients with unified interface."""
 
@@ -18,28 +28,101 @@ class AIClient(ABC):
         self.api_key = api_key
 
     @abstractmethod
-    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+    def generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        json_schema: Optional[Dict[str, Any]] = None
+    ) -> Union[str, Dict[str, Any]]:
         """
         Generate content using AI model.
 
         Args:
             prompt: User prompt
             system_prompt: System prompt (optional)
+            json_schema: JSON schema the reply must follow (optional); providers
+                with a JSON mode enforce it
 
         Returns:
-            Generated text content
+            Generated text content, or the parsed object if the provider returns
+            structured output directly (pass either to parse_json_response)
         """
         pass
 
+    @abstractmethod
+    async def agenerate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        json_schema: Optional[Dict[str, Any]] = None
+    ) -> Union[str, Dict[str, Any]]:
+        """
+        Generate content using AI model without blocking the event loop.
+
+        Args:
+            prompt: User prompt
+            system_prompt: System prompt (optional)
+            json_schema: JSON schema the reply must follow (optional); providers
+                with a JSON mode enforce it
+
+        Returns:
+            Generated text content, or the parsed object if the provider returns
+            structured output directly (pass either to parse_json_response)
+        """
+        pass
+
+    def stream_generate(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[str]:
+        """
+        Generate content using AI model, yielding text as it arrives.
+
+        Providers without a streaming implementation yield the full reply once.
+
+        Args:
+            prompt: User prompt
+            system_prompt: System prompt (optional)
+
+        Yields:
+            Successive chunks of generated text
+        """
+        yield self.generate(prompt, system_prompt)
+
+    async def astream_generate(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Generate content using AI model, yielding text as it arrives without blocking the event loop.
+
+        Providers without an asyncio SDK step through stream_generate() in a worker thread.
+
+        Args:
+            prompt: User prompt
+            system_prompt: System prompt (optional)
+
+        Yields:
+            Successive chunks of generated text
+        """
+        iterator = self.stream_generate(prompt, system_prompt)
+        done = object()
+
+        while True:
+            chunk = await asyncio.to_thread(next, iterator, done)
+            if chunk is done:
+                break
+            yield chunk
+
 
 class AnthropicClient(AIClient):
     """Claude API client."""
 
     def __init__(self, model: str, api_key: str):
         super().__init__(model, api_key)
-        self.client = anthropic.Anthropic(api_key=api_key)
-
-    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        self.client = anthropic.Anthropic(api_key=api_key, http_client=_HTTP2_CLIENT)
+        self.async_client = anthropic.AsyncAnthropic(api_key=api_key, http_client=_ASYNC_HTTP2_CLIENT)
+
+    def _build_request(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        json_schema: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         messages = [{"role": "user", "content": prompt}]
 
         kwargs: Dict[str, Any] = {
@@ -51,8 +134,54 @@ class AnthropicClient(AIClient):
         if system_prompt:
             kwargs["system"] = system_prompt
 
-        response = self.client.messages.create(**kwargs)
-        return response.content[0].text
+        if json_schema:
+            # Forcing a single tool call makes the reply the tool input, already parsed
+            kwargs["tools"] = [{
+                "name": "emit",
+                "description": "Return the requested result.",
+                "input_schema": json_schema
+            }]
+            kwargs["tool_choice"] = {"type": "tool", "name": "emit"}
+
+        return kwargs
+
+    @staticmethod
+    def _extract_content(response) -> Union[str, Dict[str, Any]]:
+        block = response.content[0]
+        if block.type == "tool_use":
+            return block.input
+        return block.text
+
+    def generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        json_schema: Optional[Dict[str, Any]] = None
+    ) -> Union[str, Dict[str, Any]]:
+        response = self.client.messages.create(**self._build_request(prompt, system_prompt, json_schema))
+        return self._extract_content(response)
+
+    async def agenerate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        json_schema: Optional[Dict[str, Any]] = None
+    ) -> Union[str, Dict[str, Any]]:
+        response = await self.async_client.messages.create(**self._build_request(prompt, system_prompt, json_schema))
+        return self._extract_content(response)
+
+    def stream_generate(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[str]:
+        with self.client.messages.stream(**self._build_request(prompt, system_prompt)) as stream:
+            yield from stream.text_stream
+
+    async def astream_generate(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        async with self.async_client.messages.stream(**self._build_request(prompt, system_prompt)) as stream:
+            async for text in stream.text_stream:
+                yield text
+
+
+# Status errors a server may answer an unsupported response_format with
+_SCHEMA_REJECTED_ERRORS = (openai.BadRequestError, openai.UnprocessableEntityError)
 
 
 class OpenAIClient(AIClient):
@@ -63,9 +192,17 @@ class OpenAIClient(AIClient):
         kwargs = {"api_key": api_key}
         if base_url:
             kwargs["base_url"] = base_url
-        self.client = openai.OpenAI(**kwargs)
-
-    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        self.client = openai.OpenAI(http_client=_HTTP2_CLIENT, **kwargs)
+        self.async_client = openai.AsyncOpenAI(http_client=_ASYNC_HTTP2_CLIENT, **kwargs)
+        # Cleared once the endpoint rejects structured outputs (e.g. older models or compatible proxies)
+        self.supports_json_schema = True
+
+    def _build_request(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        json_schema: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         messages = []
 
         if system_prompt:
@@ -73,24 +210,83 @@ class OpenAIClient(AIClient):
 
         messages.append({"role": "user", "content": prompt})
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            max_tokens=4096
-        )
+        request = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": 4096
+        }
 
-        return response.choices[0].message.content
+        if json_schema and self.supports_json_schema:
+            request["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "response", "schema": json_schema, "strict": True}
+            }
+
+        return request
+
+    @staticmethod
+    def _extract_content(response) -> str:
+        # Left unparsed: compatible endpoints may accept response_format yet still wrap
+        # the JSON in fences or prose, which parse_json_response recovers from
+        return response.choices[0].message.content or ""
+
+    def generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        json_schema: Optional[Dict[str, Any]] = None
+    ) -> Union[str, Dict[str, Any]]:
+        request = self._build_request(prompt, system_prompt, json_schema)
+
+        try:
+            response = self.client.chat.completions.create(**request)
+        except _SCHEMA_REJECTED_ERRORS:
+            if "response_format" not in request:
+                raise
+            del request["response_format"]
+            response = self.client.chat.completions.create(**request)
+            self.supports_json_schema = False
+
+        return self._extract_content(response)
+
+    async def agenerate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        json_schema: Optional[Dict[str, Any]] = None
+    ) -> Union[str, Dict[str, Any]]:
+        request = self._build_request(prompt, system_prompt, json_schema)
+
+        try:
+            response = await self.async_client.chat.completions.create(**request)
+        except _SCHEMA_REJECTED_ERRORS:
+            if "response_format" not in request:
+                raise
+            del request["response_format"]
+            response = await self.async_client.chat.completions.create(**request)
+            self.supports_json_schema = False
+
+        return self._extract_content(response)
+
+    def stream_generate(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[str]:
+        stream = self.client.chat.completions.create(stream=True, **self._build_request(prompt, system_prompt))
+
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def astream_generate(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        stream = await self.async_client.chat.completions.create(stream=True, **self._build_request(prompt, system_prompt))
+
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
 
 
 class DashScopeClient(AIClient):
     """Alibaba DashScope (Qwen) client."""
 
-    def __init__(self, model: str, api_key: str):
-        super().__init__(model, api_key)
-        import dashscope
-        dashscope.api_key = api_key
-
-    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+    def _build_messages(self, prompt: str, system_prompt: Optional[str]) -> list:
         messages = []
 
         if system_prompt:
@@ -98,22 +294,71 @@ class DashScopeClient(AIClient):
 
         messages.append({"role": "user", "content": prompt})
 
-        response = Generation.call(
-            model=self.model,
-            messages=messages,
-            result_format='message'
-        )
+        return messages
 
+    @staticmethod
+    def _extract_content(response) -> str:
         if response.status_code == 200:
             return response.output.choices[0].message.content
         else:
             raise Exception(f"DashScope API error: {response.message}")
 
+    def generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        json_schema: Optional[Dict[str, Any]] = None
+    ) -> Union[str, Dict[str, Any]]:
+        # No schema enforcement here; the prompt's JSON instructions still apply
+        response = Generation.call(
+            model=self.model,
+            messages=self._build_messages(prompt, system_prompt),
+            result_format='message',
+            api_key=self.api_key
+        )
+
+        return self._extract_content(response)
+
+    async def agenerate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        json_schema: Optional[Dict[str, Any]] = None
+    ) -> Union[str, Dict[str, Any]]:
+        # The DashScope SDK has no asyncio client; run the blocking call in a worker thread
+        response = await asyncio.to_thread(
+            Generation.call,
+            model=self.model,
+            messages=self._build_messages(prompt, system_prompt),
+            result_format='message',
+            api_key=self.api_key
+        )
+
+        return self._extract_content(response)
 
+    def stream_generate(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[str]:
+        responses = Generation.call(
+            model=self.model,
+            messages=self._build_messages(prompt, system_prompt),
+            result_format='message',
+            api_key=self.api_key,
+            stream=True,
+            incremental_output=True
+        )
+
+        for response in responses:
+            yield self._extract_content(response)
+
+
+@functools.lru_cache(maxsize=32)
 def get_client(provider: str, model: str, api_key: str, base_url: Optional[str] = None) -> AIClient:
     """
     Factory method to create appropriate AI client.
 
+    Clients are cached per (provider, model, api_key, base_url) so the SDKs'
+    HTTP connection pools stay warm across requests. Passing the API key on
+    every DashScope call keeps cached clients independent of each other.
+
     Args:
         provider: Provider name ('anthropic', 'openai', or 'dashscope')
         model: Model name
@@ -148,18 +393,20 @@ def load_api_config(username: str) -> Optional[Dict[str, Any]]:
     Returns:
         Dictionary with API configurations, or None if file doesn't exist
     """
-    from config import USERS_DIR, API_KEY_FILE
+    from core.user_manager import get_user_file
 
-    api_file = USERS_DIR / username / API_KEY_FILE
+    try:
+        with open(get_user_file(username, 'api'), 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
 
-    if not api_file.exists() or api_file.stat().st_size == 0:
+    if not data:
         return None
 
     try:
-        with open(api_file, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-        return config
-    except json.JSONDecodeError:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
         return None
 
 
@@ -174,12 +421,10 @@ def save_api_config(username: str, config: Dict[str, Any]) -> bool:
     Returns:
         True if saved successfully
     """
-    from config import USERS_DIR, API_KEY_FILE
-
-    api_file = USERS_DIR / username / API_KEY_FILE
+    from core.user_manager import get_user_file
 
-    with open(api_file, 'w', encoding='utf-8') as f:
-        json.dump(config, f, indent=2, ensure_ascii=False)
+    with open(get_user_file(username, 'api'), 'wb') as f:
+        f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
 
     return True
 
@@ -202,7 +447,7 @@ def fetch_available_models(provider_type: str, api_key: str, base_url: Optional[
             kwargs = {"api_key": api_key}
             if base_url:
                 kwargs["base_url"] = base_url
-            client = openai.OpenAI(**kwargs)
+            client = openai.OpenAI(http_client=_HTTP2_CLIENT, **kwargs)
 
             models = client.models.list()
             return [model.id for model in models.data]
@@ -0,0 +1,49 @@
+"""
+Short-lived in-process caching for filesystem-backed lookups.
+"""
+
+import functools
+import time
+from typing import Callable
+
+
+# Bumped on every write to user data; cached entries from an older generation are stale
+_generation = 0
+
+
+def invalidate() -> None:
+    """Mark every cached result as stale after user data has been written."""
+    global _generation
+    _generation += 1
+
+
+def cached(ttl: float = 2.0) -> Callable:
+    """
+    Cache a function's results per positional arguments for a short time.
+
+    Entries expire after `ttl` seconds, or immediately once invalidate() is called.
+
+    Args:
+        ttl: Time to live of a cached result, in seconds
+
+    Returns:
+        Decorator for the function to cache
+    """
+    def decorator(fn: Callable) -> Callable:
+        entries = {}
+
+        @functools.wraps(fn)
+        def wrapper(*args):
+            now = time.monotonic()
+            entry = entries.get(args)
+            if entry is not None and entry[0] == _generation and entry[1] > now:
+                return entry[2]
+
+            generation = _generation
+            result = fn(*args)
+            entries[args] = (generation, now + ttl, result)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -2,11 +2,47 @@
 Content generation module for creating articles and questions.
 """
 
+import asyncio
 import json
 import re
-from typing import List, Dict, Any, Optional
+import string
+from functools import partial
+from typing import List, Dict, Any, Optional, Callable, Tuple, Set, Union
+import orjson
+from config import WORD_USAGE_THRESHOLD
 from core.ai_client import AIClient
-from prompts.article_generation import get_article_generation_prompt
+from prompts.article_generation import get_article_generation_prompt, get_prompt_word_limit
+
+
+_PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
+
+# Opening of the article string value in a (possibly partial) JSON reply
+_ARTICLE_KEY_RE = re.compile(r'"article"\s*:\s*"')
+
+# Reply shape enforced by providers with a JSON mode; kept within the strict
+# structured-output subset (every property required, no extra keys)
+ARTICLE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "article": {"type": "string"},
+        "questions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "type": {"type": "string", "enum": ["multiple_choice", "fill_blank", "true_false"]},
+                    "question": {"type": "string"},
+                    "options": {"type": ["array", "null"], "items": {"type": "string"}},
+                    "correct_answer": {"type": ["string", "boolean"]}
+                },
+                "required": ["type", "question", "options", "correct_answer"],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["article", "questions"],
+    "additionalProperties": False
+}
 
 
 def generate_article_and_questions(
@@ -32,34 +68,141 @@ def generate_article_and_questions(
         Dictionary with 'article' and 'questions', or None if failed
     """
     system_prompt, user_prompt = get_article_generation_prompt(words, age, lexile, article_type)
+    prompt_words = words[:get_prompt_word_limit(lexile)]
+
+    # Best structurally valid reply, used if no attempt meets the word usage threshold
+    fallback = None
 
     for attempt in range(max_retries):
         try:
-            response = client.generate(user_prompt, system_prompt)
+            response = client.generate(user_prompt, system_prompt, ARTICLE_SCHEMA)
 
             # Try to extract JSON from response
             data = parse_json_response(response)
 
-            # Validate response structure
-            if validate_article_response(data):
+            # Validate response structure and word usage
+            if validate_article_response(data, prompt_words):
                 return data
+            elif validate_article_response(data):
+                fallback = data
+                print(f"Attempt {attempt + 1}: Too few word bank words used, retrying...")
             else:
                 print(f"Attempt {attempt + 1}: Invalid response structure, retrying...")
 
         except Exception as e:
             print(f"Attempt {attempt + 1} failed: {str(e)}")
-            if attempt == max_retries - 1:
-                return None
 
-    return None
+    return fallback
+
+
+async def agenerate_article_and_questions(
+    words: List[str],
+    age: int,
+    lexile: int,
+    client: AIClient,
+    article_type: str = "Story",
+    max_retries: int = 3,
+    parallel: int = 1
+) -> Optional[Dict[str, Any]]:
+    """
+    Generate reading article and test questions without blocking the event loop.
 
+    With `parallel` above 1, attempts are issued in concurrent waves, so a retry
+    overlaps with the first attempt instead of waiting for it to fail.
 
-def parse_json_response(response: str) -> Dict[str, Any]:
+    Args:
+        words: List of words to use
+        age: User's age
+        lexile: User's Lexile level
+        client: AI client instance
+        article_type: Type of article (Story, Science, Nature, History)
+        max_retries: Maximum number of attempts in total
+        parallel: Maximum number of attempts in flight at once; above 1, attempts
+            are speculative and each costs a full LLM call
+
+    Returns:
+        Dictionary with 'article' and 'questions', or None if failed
+    """
+    system_prompt, user_prompt = get_article_generation_prompt(words, age, lexile, article_type)
+    validator = partial(validate_article_response, words=words[:get_prompt_word_limit(lexile)])
+
+    return await agenerate_first_valid(
+        client, user_prompt, system_prompt, validator, max_retries, parallel,
+        fallback_validator=validate_article_response,
+        json_schema=ARTICLE_SCHEMA
+    )
+
+
+async def agenerate_first_valid(
+    client: AIClient,
+    user_prompt: str,
+    system_prompt: str,
+    validator: Callable[[Dict[str, Any]], bool],
+    max_retries: int = 3,
+    parallel: int = 1,
+    fallback_validator: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    json_schema: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Issue concurrent attempts for a prompt and return the first valid JSON reply.
+
+    Args:
+        client: AI client instance
+        user_prompt: User prompt
+        system_prompt: System prompt
+        validator: Function checking the structure of the parsed reply
+        max_retries: Maximum number of attempts in total
+        parallel: Maximum number of attempts in flight at once; above 1, attempts
+            are speculative and each costs a full LLM call
+        fallback_validator: Weaker check; a reply passing it is returned if no attempt passes `validator`
+        json_schema: JSON schema passed to providers with a JSON mode (optional)
+
+    Returns:
+        Parsed and validated dictionary, or None if every attempt failed
+    """
+    attempt = 0
+    remaining = max_retries
+    fallback = None
+
+    while remaining > 0:
+        wave_size = min(max(parallel, 1), remaining)
+        remaining -= wave_size
+
+        tasks = [
+            asyncio.ensure_future(client.agenerate(user_prompt, system_prompt, json_schema))
+            for _ in range(wave_size)
+        ]
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                attempt += 1
+                try:
+                    data = parse_json_response(await next_done)
+
+                    if validator(data):
+                        return data
+                    elif fallback_validator is not None and fallback_validator(data):
+                        fallback = data
+                        print(f"Attempt {attempt}: Reply accepted only as fallback, retrying...")
+                    else:
+                        print(f"Attempt {attempt}: Invalid response structure, retrying...")
+
+                except Exception as e:
+                    print(f"Attempt {attempt} failed: {str(e)}")
+        finally:
+            # Drop the slower speculative attempts once one has succeeded
+            for task in tasks:
+                task.cancel()
+
+    return fallback
+
+
+def parse_json_response(response: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
     """
     Parse JSON from AI response, handling various formats.
 
     Args:
-        response: Raw response text
+        response: Raw response text, or an object already parsed by a provider JSON mode
 
     Returns:
         Parsed JSON dictionary
@@ -67,31 +210,127 @@ def parse_json_response(response: str) -> Dict[str, Any]:
     Raises:
         json.JSONDecodeError: If JSON cannot be parsed
     """
+    if isinstance(response, dict):
+        return response
+
     # Try direct JSON parse
     try:
-        return json.loads(response)
-    except json.JSONDecodeError:
+        return orjson.loads(response)
+    except orjson.JSONDecodeError:
         pass
 
-    # Try to extract JSON from markdown code blocks
-    json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response, re.DOTALL)
-    if json_match:
-        return json.loads(json_match.group(1))
+    # Skip ahead to a markdown code block only when no object starts before it,
+    # so a reply followed by an unrelated fence still parses
+    fence = response.find("```")
+    offset = fence if fence != -1 and "{" not in response[:fence] else 0
+
+    while True:
+        span = _find_json_span(response, offset)
+        if span is None:
+            break
 
-    # Try to find JSON object in response
-    json_match = re.search(r'\{.*\}', response, re.DOTALL)
-    if json_match:
-        return json.loads(json_match.group(0))
+        start, end = span
+        try:
+            return orjson.loads(response[start:end])
+        except orjson.JSONDecodeError:
+            # Braces in surrounding prose; try the next candidate object
+            offset = start + 1
 
     raise json.JSONDecodeError("No valid JSON found in response", response, 0)
 
 
-def validate_article_response(data: Dict[str, Any]) -> bool:
+def extract_partial_article(response: str) -> str:
+    """
+    Extract the article text received so far from a streamed JSON reply.
+
+    Args:
+        response: Reply text received so far, possibly cut off anywhere
+
+    Returns:
+        Decoded article text so far, or "" if the article value has not started
+    """
+    match = _ARTICLE_KEY_RE.search(response)
+    if not match:
+        return ""
+
+    start = i = match.end()
+    n = len(response)
+
+    while i < n:
+        ch = response[i]
+        if ch == "\\":
+            # Stop before an escape sequence cut off at the end of the chunk
+            length = 6 if response[i + 1:i + 2] == "u" else 2
+            if i + length > n:
+                break
+            i += length
+        elif ch == '"':
+            break
+        else:
+            i += 1
+
+    try:
+        # strict=False: models sometimes emit raw newlines inside the string
+        article = json.loads(f'"{response[start:i]}"', strict=False)
+    except json.JSONDecodeError:
+        return ""
+
+    # Half of a surrogate pair; the other half is in the next chunk
+    if article and "\ud800" <= article[-1] <= "\udbff":
+        article = article[:-1]
+
+    return article
+
+
+def _find_json_span(s: str, offset: int = 0) -> Optional[Tuple[int, int]]:
+    """
+    Locate the first balanced JSON object in a string with a single scan.
+
+    Args:
+        s: String to scan
+        offset: Index to start scanning from
+
+    Returns:
+        (start, end) slice bounds of the object, or None if no balanced object is found
+    """
+    start = s.find("{", offset)
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escape = False
+
+    for i in range(start, len(s)):
+        ch = s[i]
+
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return start, i + 1
+
+    return None
+
+
+def validate_article_response(data: Dict[str, Any], words: Optional[List[str]] = None) -> bool:
     """
     Validate the structure of article generation response.
 
     Args:
         data: Response data dictionary
+        words: Word bank words given in the prompt; if provided, the article
+            must use at least WORD_USAGE_THRESHOLD of them
 
     Returns:
         True if valid, False otherwise
@@ -131,4 +370,105 @@ def validate_article_response(data: Dict[str, Any]) -> bool:
         elif q['type'] not in ['fill_blank', 'true_false']:
             return False
 
+    # Checked last: the single pass over the article only matters for well-formed replies
+    if words and word_usage_ratio(words, data['article']) < WORD_USAGE_THRESHOLD:
+        return False
+
     return True
+
+
+def _inflections(word: str) -> Set[str]:
+    """
+    Generate the regular inflected forms of a lowercase word.
+
+    Covers plurals and verb endings ("bus" -> "buses", "stop" -> "stopped",
+    "make" -> "making", "study" -> "studies"); irregular forms are not handled.
+
+    Args:
+        word: Lowercase word from the word bank
+
+    Returns:
+        Set containing the word and its inflected forms
+    """
+    forms = {word}
+    for suffix in ("s", "es", "ed", "d", "ing", "er", "est"):
+        forms.add(word + suffix)
+
+    if len(word) > 2 and word.endswith("y") and word[-2] not in "aeiou":
+        forms.update(word[:-1] + suffix for suffix in ("ies", "ied", "ier", "iest"))
+
+    # make -> making, large -> larger
+    if len(word) > 2 and word.endswith("e"):
+        forms.update(word[:-1] + suffix for suffix in ("ing", "er", "est"))
+
+    # run -> running, stop -> stopped, big -> bigger
+    if (len(word) > 2 and word[-1] not in "aeiouwxy"
+            and word[-2] in "aeiou" and word[-3] not in "aeiou"):
+        forms.update(word + word[-1] + suffix for suffix in ("ed", "ing", "er", "est"))
+
+    return forms
+
+
+def _article_words(article: str) -> Tuple[str, Set[str]]:
+    """
+    Normalize an article for word lookups in a single pass.
+
+    Args:
+        article: Article text
+
+    Returns:
+        Tuple of (lowercase text without punctuation, set of its words)
+    """
+    tokens = article.lower().translate(_PUNCTUATION_TABLE).split()
+    return " ".join(tokens), set(tokens)
+
+
+def _phrase_used(phrase: str, padded_text: str) -> bool:
+    """
+    Check whether a multi-word entry appears in normalized article text.
+
+    Either the first word ("looked after") or the last word ("ice creams")
+    may be inflected.
+
+    Args:
+        phrase: Normalized multi-word entry
+        padded_text: Normalized article text padded with spaces
+
+    Returns:
+        True if some form of the phrase appears in the text
+    """
+    first, *middle, last = phrase.split()
+    rest = " ".join(middle + [last])
+    head = " ".join([first] + middle)
+    candidates = {f"{form} {rest}" for form in _inflections(first)}
+    candidates.update(f"{head} {form}" for form in _inflections(last))
+    return any(f" {candidate} " in padded_text for candidate in candidates)
+
+
+def word_usage_ratio(words: List[str], article: str) -> float:
+    """
+    Compute the fraction of word bank entries that appear in an article.
+
+    Args:
+        words: Word bank entries (single words or short phrases)
+        article: Article text
+
+    Returns:
+        Ratio between 0 and 1; 1.0 if there are no words
+    """
+    wanted = {" ".join(w.lower().translate(_PUNCTUATION_TABLE).split()) for w in words}
+    wanted.discard("")
+    if not wanted:
+        return 1.0
+
+    text, article_words = _article_words(article)
+    padded_text = f" {text} "
+
+    # Inflected uses ("teachers" for "teacher") count as uses of the entry
+    used = sum(
+        1 for w in wanted
+        if (_phrase_used(w, padded_text) if " " in w
+            else not _inflections(w).isdisjoint(article_words))
+    )
+
+    return used / len(wanted)
@@ -2,15 +2,62 @@
 Evaluation module for grading answers and saving test logs.
 """
 
-import json
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Any, Optional
+import orjson
 from core.ai_client import AIClient
-from prompts.evaluation import get_evaluation_prompt
+from core.log_manager import append_log_index
+from prompts.evaluation import get_evaluation_prompt, get_batch_evaluation_prompt
 from config import USERS_DIR, LOG_DIR
 
 
+# Row-marshaling returns diminish quickly as more sessions share one prompt
+_MAX_ROWS_PER_CALL = 8
+
+# Reply shapes enforced by providers with a JSON mode (strict structured-output subset)
+EVAL_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "score": {"type": "number"},
+        "item_analysis": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "question_num": {"type": "integer"},
+                    "correct": {"type": "boolean"},
+                    "feedback": {"type": "string"}
+                },
+                "required": ["question_num", "correct", "feedback"],
+                "additionalProperties": False
+            }
+        },
+        "overall_feedback": {"type": "string"},
+        "suggestions": {"type": "string"}
+    },
+    "required": ["score", "item_analysis", "overall_feedback", "suggestions"],
+    "additionalProperties": False
+}
+
+BATCH_EVAL_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"item": {"type": "integer"}, **EVAL_SCHEMA["properties"]},
+                "required": ["item", *EVAL_SCHEMA["required"]],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["results"],
+    "additionalProperties": False
+}
+
+
 def evaluate_answers(
     questions: List[Dict[str, Any]],
     user_answers: List[str],
@@ -33,7 +80,7 @@ def evaluate_answers(
 
     for attempt in range(max_retries):
         try:
-            response = client.generate(user_prompt, system_prompt)
+            response = client.generate(user_prompt, system_prompt, EVAL_SCHEMA)
 
             # Try to extract JSON from response
             from core.content_generator import parse_json_response
@@ -53,6 +100,118 @@ def evaluate_answers(
     return None
 
 
+async def aevaluate_answers(
+    questions: List[Dict[str, Any]],
+    user_answers: List[str],
+    client: AIClient,
+    max_retries: int = 3,
+    parallel: int = 1
+) -> Optional[Dict[str, Any]]:
+    """
+    Evaluate user's answers using AI without blocking the event loop.
+
+    Args:
+        questions: List of question dictionaries
+        user_answers: List of user's answers
+        client: AI client instance
+        max_retries: Maximum number of attempts in total
+        parallel: Maximum number of attempts in flight at once; above 1, attempts
+            are speculative and each costs a full LLM call
+
+    Returns:
+        Dictionary with evaluation results, or None if failed
+    """
+    from core.content_generator import agenerate_first_valid
+
+    system_prompt, user_prompt = get_evaluation_prompt(questions, user_answers)
+
+    return await agenerate_first_valid(
+        client, user_prompt, system_prompt, validate_evaluation_response, max_retries, parallel,
+        json_schema=EVAL_SCHEMA
+    )
+
+
+def batch_evaluate_answers(
+    questions: List[Dict[str, Any]],
+    answers_matrix: List[List[str]],
+    client: AIClient,
+    max_retries: int = 3,
+    max_rows_per_call: int = _MAX_ROWS_PER_CALL
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Evaluate several test sessions on the same questions with as few AI calls as possible.
+
+    Sessions are grouped into chunks of up to `max_rows_per_call` and each chunk
+    is graded by a single prompt.
+
+    Args:
+        questions: List of question dictionaries
+        answers_matrix: One list of user's answers per test session
+        client: AI client instance
+        max_retries: Maximum number of retry attempts per chunk
+        max_rows_per_call: Maximum number of sessions graded in one call
+
+    Returns:
+        List of evaluation dictionaries in the order of `answers_matrix`;
+        an entry is None if its chunk could not be evaluated
+    """
+    from core.content_generator import parse_json_response
+
+    results: List[Optional[Dict[str, Any]]] = []
+    chunk_size = max(max_rows_per_call, 1)
+
+    for start in range(0, len(answers_matrix), chunk_size):
+        chunk = answers_matrix[start:start + chunk_size]
+        system_prompt, user_prompt = get_batch_evaluation_prompt(questions, chunk)
+
+        chunk_results: List[Optional[Dict[str, Any]]] = [None] * len(chunk)
+        for attempt in range(max_retries):
+            try:
+                response = client.generate(user_prompt, system_prompt, BATCH_EVAL_SCHEMA)
+                data = parse_json_response(response)
+
+                if validate_batch_evaluation_response(data, len(chunk)):
+                    chunk_results = sorted(data['results'], key=lambda r: r['item'])
+                    break
+                else:
+                    print(f"Attempt {attempt + 1}: Invalid batch evaluation structure, retrying...")
+
+            except Exception as e:
+                print(f"Attempt {attempt + 1} failed: {str(e)}")
+
+        results.extend(chunk_results)
+
+    return results
+
+
+def validate_batch_evaluation_response(data: Dict[str, Any], expected_items: int) -> bool:
+    """
+    Validate the structure of a batch evaluation response.
+
+    Args:
+        data: Response data dictionary
+        expected_items: Number of test sessions in the prompt
+
+    Returns:
+        True if valid, False otherwise
+    """
+    if not isinstance(data, dict):
+        return False
+
+    results = data.get('results')
+    if not isinstance(results, list) or len(results) != expected_items:
+        return False
+
+    if not all(validate_evaluation_response(item) for item in results):
+        return False
+
+    # Each session must be graded exactly once, numbered as in the prompt
+    numbers = [item.get('item') for item in results]
+    if not all(type(n) is int for n in numbers):
+        return False
+    return sorted(numbers) == list(range(1, expected_items + 1))
+
+
 def validate_evaluation_response(data: Dict[str, Any]) -> bool:
     """
     Validate the structure of evaluation response.
@@ -124,8 +283,8 @@ def save_article_log(
     }
 
     # Save to file
-    with open(log_file, 'w', encoding='utf-8') as f:
-        json.dump(log_data, f, indent=2, ensure_ascii=False)
+    log_file.write_bytes(orjson.dumps(log_data, option=orjson.OPT_INDENT_2))
+    append_log_index(username, log_file, log_data)
 
     return full_timestamp
 
@@ -176,7 +335,7 @@ def save_test_log(
     }
 
     # Save to file
-    with open(log_file, 'w', encoding='utf-8') as f:
-        json.dump(log_data, f, indent=2, ensure_ascii=False)
+    log_file.write_bytes(orjson.dumps(log_data, option=orjson.OPT_INDENT_2))
+    append_log_index(username, log_file, log_data)
 
     return True
@@ -2,47 +2,257 @@
 Log management module for retrieving and displaying test history.
 """
 
-import json
+import mmap
+import os
+import threading
+from operator import attrgetter, itemgetter
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 from datetime import datetime
-from config import USERS_DIR, LOG_DIR
+import orjson
+from config import USERS_DIR, LOG_DIR, LOG_INDEX_FILE
 
 
-def get_user_logs(username: str) -> List[Dict[str, Any]]:
+# Fields copied from a log into its history index entry
+_SUMMARY_FIELDS = ('timestamp', 'score', 'status', 'article_type')
+
+# Display templates for format_log_for_display; each fills one block in a single call
+_HEADER_TMPL = "# {kind} Log - {timestamp}\n\n**Type:** {article_type}\n{status_line}\n"
+_QUESTION_TMPL = "\n### Question {n}\n**Type:** {type}\n**Question:** {question}"
+_ANSWER_TMPL = "**Your Answer:** {ans}\n**Correct Answer:** {correct}"
+_MC_OPTION_TMPL = "  - {}"
+
+# Per-thread fragment list reused by format_log_for_display (UI handlers run on worker threads)
+_FORMAT_BUFFERS = threading.local()
+
+
+def _scan_date_dirs(log_base_dir: Path) -> List[Tuple[str, str]]:
     """
-    Get all logs (both article and test) for a user.
+    List the date directories of a user's log directory.
 
     Args:
-        username: The username
+        log_base_dir: The user's log directory
+
+    Returns:
+        List of (name, path) tuples, newest first
+
+    Raises:
+        FileNotFoundError: If the log directory does not exist
+    """
+    with os.scandir(log_base_dir) as it:
+        date_dirs = [
+            (entry.name, entry.path)
+            for entry in it if entry.is_dir(follow_symlinks=False)
+        ]
+
+    date_dirs.sort(key=itemgetter(0), reverse=True)
+    return date_dirs
+
+
+def _iter_log_files(date_dirs: List[Tuple[str, str]]) -> Iterator[str]:
+    """
+    Yield the paths of ALL log files (test_*.json and article_*.json), newest first.
+
+    Args:
+        date_dirs: Date directories as returned by _scan_date_dirs()
+
+    Yields:
+        Log file paths
+    """
+    for _, date_path in date_dirs:
+        with os.scandir(date_path) as it:
+            log_files = [entry for entry in it if entry.name.endswith(".json")]
+        log_files.sort(key=attrgetter('name'), reverse=True)
+
+        for entry in log_files:
+            yield entry.path
+
+
+def _read_file(path: str) -> bytes:
+    """
+    Read a whole file with a single read call and no Python-level buffering.
+
+    Args:
+        path: File path
+
+    Returns:
+        File contents
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, os.fstat(fd).st_size)
+    finally:
+        os.close(fd)
+
+
+def _read_log_summary(log_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the summary fields of a log file.
+
+    The whole log is parsed so only its top-level fields are picked up; nested
+    LLM-produced data may reuse names like "score" or "status". This only runs
+    when the history index is rebuilt.
+
+    Args:
+        log_path: Path of the log file
 
     Returns:
-        List of log dictionaries, sorted by date (newest first)
+        Dictionary of the summary fields present in the log, or None if it cannot be read
+    """
+    try:
+        log_data = orjson.loads(_read_file(log_path))
+    except (OSError, orjson.JSONDecodeError) as e:
+        print(f"Error reading log file {log_path}: {e}")
+        return None
+
+    return {field: log_data[field] for field in _SUMMARY_FIELDS if field in log_data}
+
+
+def append_log_index(username: str, log_file: Path, log_data: Dict[str, Any]) -> None:
+    """
+    Record a newly written log in the user's append-only history index.
+
+    Args:
+        username: The username
+        log_file: Path of the log file that was just written
+        log_data: Log data dictionary that was written
     """
     log_base_dir = USERS_DIR / username / LOG_DIR
+    index_file = log_base_dir / LOG_INDEX_FILE
+
+    if not index_file.exists():
+        # First index for this user; the rebuild also picks up the new log
+        _rebuild_log_index(username)
+        return
+
+    entry = {field: log_data[field] for field in _SUMMARY_FIELDS if field in log_data}
+    entry['path'] = log_file.relative_to(log_base_dir).as_posix()
 
-    if not log_base_dir.exists():
-        return []
+    with open(index_file, 'ab') as f:
+        f.write(orjson.dumps(entry) + b"\n")
 
-    logs = []
 
-    # Iterate through date directories
-    for date_dir in sorted(log_base_dir.iterdir(), reverse=True):
-        if not date_dir.is_dir():
+def _rebuild_log_index(username: str) -> None:
+    """
+    Write the history index from the log files on disk.
+
+    Args:
+        username: The username
+    """
+    log_base_dir = USERS_DIR / username / LOG_DIR
+
+    try:
+        log_paths = list(_iter_log_files(_scan_date_dirs(log_base_dir)))
+    except FileNotFoundError:
+        return
+
+    lines = []
+    # The index is kept oldest first, the reverse of the log file order
+    for log_path in reversed(log_paths):
+        entry = _read_log_summary(log_path)
+        if entry is None:
             continue
+        entry['path'] = Path(log_path).relative_to(log_base_dir).as_posix()
+        lines.append(orjson.dumps(entry))
+
+    lines.append(b"")
+    (log_base_dir / LOG_INDEX_FILE).write_bytes(b"\n".join(lines))
 
-        # Iterate through ALL log files (test_*.json and article_*.json)
-        for log_file in sorted(date_dir.glob("*.json"), reverse=True):
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    log_data = json.load(f)
-                    log_data['file_path'] = str(log_file)
-                    logs.append(log_data)
-            except Exception as e:
-                print(f"Error reading log file {log_file}: {e}")
-                continue
 
-    return logs
+def get_user_log_summaries(username: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Get summaries of all logs for a user from the history index.
+
+    Each summary has 'timestamp', 'score', 'status', 'article_type' and the
+    log's 'path' relative to the user's log directory, for load_log().
+
+    Args:
+        username: The username
+        limit: Maximum number of summaries to return (optional)
+
+    Returns:
+        List of summary dictionaries, newest first
+    """
+    log_base_dir = USERS_DIR / username / LOG_DIR
+    index_file = log_base_dir / LOG_INDEX_FILE
+
+    if not index_file.exists():
+        if not log_base_dir.exists():
+            return []
+        # Logs written before the index existed
+        _rebuild_log_index(username)
+
+    with open(index_file, 'rb') as f:
+        if f.seek(0, 2) == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            summaries = []
+            end = len(mm)
+
+            # The index is oldest first; walk it backwards and stop once enough entries are read
+            while end > 0 and (limit is None or len(summaries) < limit):
+                start = mm.rfind(b"\n", 0, end) + 1
+                line = mm[start:end]
+                end = start - 1
+
+                if not line:
+                    continue
+                try:
+                    summaries.append(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    print(f"Skipping malformed log index entry for {username}")
+
+    return summaries
+
+
+def load_log(username: str, path: str) -> Optional[Dict[str, Any]]:
+    """
+    Load a single log by its path from the history index.
+
+    Args:
+        username: The username
+        path: Log path relative to the user's log directory
+
+    Returns:
+        Log data dictionary, or None if it cannot be read
+    """
+    log_base_dir = (USERS_DIR / username / LOG_DIR).resolve()
+    log_file = (log_base_dir / path).resolve()
+
+    # The path may come from the UI; never read outside the user's log directory
+    if log_base_dir not in log_file.parents:
+        return None
+
+    try:
+        log_data = orjson.loads(log_file.read_bytes())
+    except (OSError, orjson.JSONDecodeError) as e:
+        print(f"Error reading log file {log_file}: {e}")
+        return None
+
+    log_data['file_path'] = str(log_file)
+    return log_data
+
+
+def _format_question(n: int, q: Dict[str, Any]) -> str:
+    """
+    Format a question and, for multiple choice, its options as one block.
+
+    Args:
+        n: Question number (1-based)
+        q: Question dictionary
+
+    Returns:
+        Formatted question block
+    """
+    block = _QUESTION_TMPL.format_map({
+        'n': n, 'type': q.get('type', 'N/A'), 'question': q.get('question', 'N/A')
+    })
+
+    if q.get('type') == 'multiple_choice' and 'options' in q:
+        options = "\n".join(_MC_OPTION_TMPL.format(opt) for opt in q['options'])
+        block = f"{block}\n**Options:**\n{options}" if options else f"{block}\n**Options:**"
+
+    return block
 
 
 def format_log_for_display(log_data: Dict[str, Any]) -> str:
@@ -55,19 +265,27 @@ def format_log_for_display(log_data: Dict[str, Any]) -> str:
     Returns:
         Formatted string for display
     """
-    output = []
+    # Reuse this thread's fragment list instead of allocating one per call
+    output = getattr(_FORMAT_BUFFERS, 'output', None)
+    if output is None:
+        output = _FORMAT_BUFFERS.output = []
+    else:
+        output.clear()
 
     status = log_data.get('status', 'completed')
     article_type = log_data.get('article_type', 'N/A')
+    timestamp = log_data.get('timestamp', 'Unknown')
 
     if status == 'generated':
-        output.append(f"# Article Log - {log_data.get('timestamp', 'Unknown')}")
-        output.append(f"\n**Type:** {article_type}")
-        output.append(f"**Status:** Generated (Not yet completed)\n")
+        output.append(_HEADER_TMPL.format_map({
+            'kind': 'Article', 'timestamp': timestamp, 'article_type': article_type,
+            'status_line': "**Status:** Generated (Not yet completed)"
+        }))
     else:
-        output.append(f"# Test Log - {log_data.get('timestamp', 'Unknown')}")
-        output.append(f"\n**Type:** {article_type}")
-        output.append(f"**Score: {log_data.get('score', 'N/A')}/100**\n")
+        output.append(_HEADER_TMPL.format_map({
+            'kind': 'Test', 'timestamp': timestamp, 'article_type': article_type,
+            'status_line': f"**Score: {log_data.get('score', 'N/A')}/100**"
+        }))
 
     output.append("## Article")
     output.append(log_data.get('article', 'N/A'))
@@ -79,23 +297,18 @@ def format_log_for_display(log_data: Dict[str, Any]) -> str:
 
     # Display questions with or without answers based on status
     if user_answers and len(user_answers) > 0:
-        # Show questions with answers (completed test)
-        for i, (q, ans) in enumerate(zip(questions, user_answers), 1):
-            output.append(f"\n### Question {i}")
-            output.append(f"**Type:** {q.get('type', 'N/A')}")
-            output.append(f"**Question:** {q.get('question', 'N/A')}")
+        # Show questions with answers (completed test); pad the analyses so one zip covers all three
+        item_analysis = item_analysis or []
+        analyses = item_analysis + [None] * (len(questions) - len(item_analysis))
 
-            if q.get('type') == 'multiple_choice' and 'options' in q:
-                output.append("**Options:**")
-                for opt in q['options']:
-                    output.append(f"  - {opt}")
-
-            output.append(f"**Your Answer:** {ans}")
-            output.append(f"**Correct Answer:** {q.get('correct_answer', 'N/A')}")
+        for i, (q, ans, analysis) in enumerate(zip(questions, user_answers, analyses), 1):
+            output.append(_format_question(i, q))
+            output.append(_ANSWER_TMPL.format_map({
+                'ans': ans, 'correct': q.get('correct_answer', 'N/A')
+            }))
 
             # Add analysis if available
-            if i - 1 < len(item_analysis):
-                analysis = item_analysis[i - 1]
+            if analysis is not None:
                 correct = analysis.get('correct', False)
                 status_mark = "✓ Correct" if correct else "✗ Incorrect"
                 output.append(f"**Result:** {status_mark}")
@@ -104,14 +317,7 @@ def format_log_for_display(log_data: Dict[str, Any]) -> str:
     else:
         # Show questions only (generated but not completed)
         for i, q in enumerate(questions, 1):
-            output.append(f"\n### Question {i}")
-            output.append(f"**Type:** {q.get('type', 'N/A')}")
-            output.append(f"**Question:** {q.get('question', 'N/A')}")
-
-            if q.get('type') == 'multiple_choice' and 'options' in q:
-                output.append("**Options:**")
-                for opt in q['options']:
-                    output.append(f"  - {opt}")
+            output.append(_format_question(i, q))
 
     # Only show feedback and suggestions if available
     if log_data.get('overall_feedback'):
@@ -122,25 +328,29 @@ def format_log_for_display(log_data: Dict[str, Any]) -> str:
         output.append("\n## Suggestions")
         output.append(log_data.get('suggestions'))
 
-    return "\n".join(output)
+    result = "\n".join(output)
+    output.clear()
+    return result
 
 
-def get_score_history(username: str) -> List[tuple]:
+def get_score_history(username: str, limit: Optional[int] = None) -> List[tuple]:
     """
     Get score history for a user.
 
     Args:
         username: The username
+        limit: Maximum number of most recent entries to return (optional)
 
     Returns:
-        List of (timestamp, score) tuples
+        List of (timestamp, score) tuples, newest first
     """
-    logs = get_user_logs(username)
+    # The history index already holds both fields; no need to open every log
+    summaries = get_user_log_summaries(username, limit)
 
     history = []
-    for log in logs:
-        timestamp = log.get('timestamp', '')
-        score = log.get('score', 0)
+    for summary in summaries:
+        timestamp = summary.get('timestamp', '')
+        score = summary.get('score', 0)
         history.append((timestamp, score))
 
     return history
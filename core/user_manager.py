@@ -2,24 +2,55 @@
 User management module for creating, loading, and managing user profiles.
 """
 
+import functools
 import os
+import re
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 from config import USERS_DIR, USER_INFO_FILE, API_KEY_FILE, WORD_BANK_FILE, LOG_DIR
+from core.cache import invalidate
+
+
+# "key: value" lines of the user info file
+_USER_INFO_RE = re.compile(r'^\s*(age|lexile_level)\s*:\s*(\d+)', re.M)
+
+# File names of the per-user files, by kind
+_USER_FILES = {
+    'info': USER_INFO_FILE,
+    'words': WORD_BANK_FILE,
+    'api': API_KEY_FILE,
+    'prefs': "preferences.txt"
+}
+
+# (mtime_ns of USERS_DIR, sorted usernames) from the last list_users() scan
+_USERS_CACHE: Optional[Tuple[int, List[str]]] = None
 
 
 def list_users() -> List[str]:
     """
     List all existing users.
 
+    The listing is reused until the users directory's mtime changes (a user
+    directory was created, renamed or removed elsewhere) or create_user() runs.
+
     Returns:
         List of usernames
     """
-    if not USERS_DIR.exists():
+    global _USERS_CACHE
+
+    try:
+        mtime = os.stat(USERS_DIR).st_mtime_ns
+        if _USERS_CACHE is not None and _USERS_CACHE[0] == mtime:
+            return list(_USERS_CACHE[1])
+
+        # DirEntry.is_dir() reuses the file type from the directory listing instead of a stat per entry
+        with os.scandir(USERS_DIR) as entries:
+            users = sorted(entry.name for entry in entries if entry.is_dir())
+    except FileNotFoundError:
         return []
 
-    users = [d.name for d in USERS_DIR.iterdir() if d.is_dir()]
-    return sorted(users)
+    _USERS_CACHE = (mtime, users)
+    return list(users)
 
 
 def create_user(username: str) -> bool:
@@ -32,19 +63,20 @@ def create_user(username: str) -> bool:
     Returns:
         True if created successfully, False if user already exists
     """
+    global _USERS_CACHE
+
     user_dir = USERS_DIR / username
 
     if user_dir.exists():
         return False
 
-    # Create user directory structure
-    user_dir.mkdir(parents=True, exist_ok=True)
-    (user_dir / LOG_DIR).mkdir(exist_ok=True)
+    # Create user directory structure; the user's files are created on first save,
+    # and every reader treats a missing file as empty
+    (user_dir / LOG_DIR).mkdir(parents=True, exist_ok=True)
 
-    # Create empty files
-    (user_dir / USER_INFO_FILE).touch()
-    (user_dir / API_KEY_FILE).touch()
-    (user_dir / WORD_BANK_FILE).touch()
+    # Coarse mtime granularity can hide a second change in the same tick
+    _USERS_CACHE = None
+    invalidate()
 
     return True
 
@@ -59,24 +91,13 @@ def load_user_info(username: str) -> Optional[Dict[str, int]]:
     Returns:
         Dictionary with 'age' and 'lexile_level', or None if user doesn't exist
     """
-    user_dir = USERS_DIR / username
-    info_file = user_dir / USER_INFO_FILE
-
-    if not info_file.exists():
+    try:
+        with open(get_user_file(username, 'info'), 'r', encoding='utf-8') as f:
+            text = f.read()
+    except FileNotFoundError:
         return None
 
-    info = {}
-    with open(info_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if ':' in line:
-                key, value = line.split(':', 1)
-                key = key.strip()
-                value = value.strip()
-                if key == 'age':
-                    info['age'] = int(value)
-                elif key == 'lexile_level':
-                    info['lexile_level'] = int(value)
+    info = {key: int(value) for key, value in _USER_INFO_RE.findall(text)}
 
     return info if info else None
 
@@ -98,12 +119,12 @@ def save_user_info(username: str, age: int, lexile: int) -> bool:
     if not user_dir.exists():
         create_user(username)
 
-    info_file = user_dir / USER_INFO_FILE
-
-    with open(info_file, 'w', encoding='utf-8') as f:
+    with open(get_user_file(username, 'info'), 'w', encoding='utf-8') as f:
         f.write(f"age: {age}\n")
         f.write(f"lexile_level: {lexile}\n")
 
+    invalidate()
+
     return True
 
 
@@ -120,6 +141,21 @@ def get_user_dir(username: str) -> Path:
     return USERS_DIR / username
 
 
+@functools.lru_cache(maxsize=256)
+def get_user_file(username: str, kind: str) -> str:
+    """
+    Get the path of one of a user's files as a plain string.
+
+    Args:
+        username: The username
+        kind: 'info', 'words', 'api' or 'prefs'
+
+    Returns:
+        File path, ready for open() and os.path functions
+    """
+    return os.path.join(USERS_DIR, username, _USER_FILES[kind])
+
+
 def user_exists(username: str) -> bool:
     """
     Check if a user exists.
@@ -150,9 +186,7 @@ def save_user_preferences(username: str, provider: str, model: str) -> bool:
     if not user_dir.exists():
         return False
 
-    pref_file = user_dir / "preferences.txt"
-
-    with open(pref_file, 'w', encoding='utf-8') as f:
+    with open(get_user_file(username, 'prefs'), 'w', encoding='utf-8') as f:
         f.write(f"provider: {provider}\n")
         f.write(f"model: {model}\n")
 
@@ -169,10 +203,9 @@ def load_user_preferences(username: str) -> Optional[Dict[str, str]]:
     Returns:
         Dictionary with 'provider' and 'model', or None if not found
     """
-    user_dir = USERS_DIR / username
-    pref_file = user_dir / "preferences.txt"
+    pref_file = get_user_file(username, 'prefs')
 
-    if not pref_file.exists():
+    if not os.path.exists(pref_file):
         return None
 
     prefs = {}
@@ -2,36 +2,89 @@
 Word bank management module for loading, saving, and deduplicating words.
 """
 
-from pathlib import Path
-from typing import List, Set
-from config import USERS_DIR, WORD_BANK_FILE
+import mmap
+import os
+import re
+from typing import List, Set, Dict, Tuple
+from core.user_manager import get_user_file
+from core.cache import cached, invalidate
 
 
-def load_words(username: str) -> List[str]:
+# One word bank entry: a line's content without surrounding whitespace
+_WORD_RE = re.compile(r"\S(?:[^\r\n]*\S)?")
+
+# Lowercased word bank entries per user for add_words, stamped with the file's (mtime_ns, size)
+_WORD_CACHE: Dict[str, Tuple[Tuple[int, int], Set[str]]] = {}
+
+
+def _file_stamp(path: str) -> Tuple[int, int]:
+    """
+    Get a cheap change marker for a file.
+
+    Args:
+        path: File path
+
+    Returns:
+        Tuple of (mtime_ns, size), or (0, 0) if the file does not exist
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return 0, 0
+
+    return st.st_mtime_ns, st.st_size
+
+
+def parse_words(text: str) -> List[str]:
+    """
+    Split word bank text (one word or phrase per line) into entries.
+
+    Args:
+        text: Raw word bank text
+
+    Returns:
+        List of non-empty, stripped entries
+    """
+    return _WORD_RE.findall(text) if text else []
+
+
+@cached(ttl=2.0)
+def load_words(username: str) -> Tuple[str, ...]:
     """
     Load words from user's word bank.
 
+    The result is shared by every caller until the cache entry expires,
+    so it is returned as an immutable tuple.
+
     Args:
         username: The username
 
     Returns:
-        List of words
+        Tuple of words
     """
-    word_file = USERS_DIR / username / WORD_BANK_FILE
-
-    if not word_file.exists():
-        return []
+    word_file = get_user_file(username, 'words')
 
-    with open(word_file, 'r', encoding='utf-8') as f:
-        words = [line.strip() for line in f if line.strip()]
+    try:
+        with open(word_file, 'rb') as f:
+            # An empty file cannot be memory-mapped
+            if f.seek(0, os.SEEK_END) == 0:
+                return ()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                data = mm[:]
+    except FileNotFoundError:
+        return ()
 
-    return words
+    # Decode once and split all lines in a single regex pass
+    return tuple(parse_words(data.decode('utf-8')))
 
 
 def save_words(username: str, words: List[str]) -> bool:
     """
     Save words to user's word bank.
 
+    The file is kept canonical: entries are stripped, blank ones dropped,
+    and only the first spelling of a word is kept (ignoring case).
+
     Args:
         username: The username
         words: List of words to save
@@ -39,12 +92,23 @@ def save_words(username: str, words: List[str]) -> bool:
     Returns:
         True if saved successfully
     """
-    word_file = USERS_DIR / username / WORD_BANK_FILE
+    word_file = get_user_file(username, 'words')
+
+    seen: Set[str] = set()
+    lines = []
+    for word in words:
+        word = word.strip()
+        word_lower = word.lower()
+        if word and word_lower not in seen:
+            seen.add(word_lower)
+            lines.append(f"{word}\n")
 
     with open(word_file, 'w', encoding='utf-8') as f:
-        for word in words:
-            if word.strip():
-                f.write(f"{word.strip()}\n")
+        f.writelines(lines)
+
+    # The lowercased entries just written are exactly what add_words needs
+    _WORD_CACHE[username] = (_file_stamp(word_file), seen)
+    invalidate()
 
     return True
 
@@ -53,6 +117,9 @@ def deduplicate_words(username: str) -> int:
     """
     Remove duplicate words from user's word bank.
 
+    Banks written by save_words() and add_words() have no duplicates; this
+    cleans up files edited by hand or saved by older versions.
+
     Args:
         username: The username
 
@@ -64,16 +131,22 @@ def deduplicate_words(username: str) -> int:
 
     # Deduplicate while preserving order
     seen: Set[str] = set()
+    seen_add = seen.add
     unique_words = []
+    unique_words_append = unique_words.append
     for word in words:
         word_lower = word.lower()
         if word_lower not in seen:
-            seen.add(word_lower)
-            unique_words.append(word)
+            seen_add(word_lower)
+            unique_words_append(word)
 
-    save_words(username, unique_words)
+    removed = original_count - len(unique_words)
 
-    return original_count - len(unique_words)
+    # Nothing to remove: skip rewriting the file
+    if removed:
+        save_words(username, unique_words)
+
+    return removed
 
 
 def add_words(username: str, new_words: List[str]) -> int:
@@ -87,22 +160,50 @@ def add_words(username: str, new_words: List[str]) -> int:
     Returns:
         Number of new words added (excluding duplicates)
     """
-    existing_words = load_words(username)
-    existing_set = {w.lower() for w in existing_words}
-
-    added_count = 0
+    word_file = get_user_file(username, 'words')
+
+    # Taken out while updating so a failed write cannot leave unwritten words cached
+    stamp = _file_stamp(word_file)
+    cached_entry = _WORD_CACHE.pop(username, None)
+    if cached_entry is not None and cached_entry[0] == stamp:
+        existing_set = cached_entry[1]
+    else:
+        # The file changed behind the cache; read it directly rather than through load_words' TTL
+        existing_set = {w.lower() for w in load_words.__wrapped__(username)}
+
+    added_words = []
+    existing_set_add = existing_set.add
+    added_words_append = added_words.append
     for word in new_words:
         word = word.strip()
-        if word and word.lower() not in existing_set:
-            existing_words.append(word)
-            existing_set.add(word.lower())
-            added_count += 1
+        if not word:
+            continue
+        word_lower = word.lower()
+        if word_lower in existing_set:
+            continue
+        added_words_append(word)
+        existing_set_add(word_lower)
+
+    # Append only the new words instead of rewriting the whole file
+    if added_words:
+        data = "".join(f"{word}\n" for word in added_words).encode('utf-8')
+
+        with open(word_file, 'a+b') as f:
+            # Don't join the first new word onto an unterminated last line
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    data = b"\n" + data
+            f.write(data)
+
+        invalidate()
 
-    save_words(username, existing_words)
+    _WORD_CACHE[username] = (_file_stamp(word_file), existing_set)
 
-    return added_count
+    return len(added_words)
 
 
+@cached(ttl=2.0)
 def get_word_count(username: str) -> int:
     """
     Get the number of words in user's word bank.
@@ -2,36 +2,19 @@
 Prompt templates for answer evaluation.
 """
 
+from string import Template
 from typing import List, Dict, Any
 
 
-def get_evaluation_prompt(questions: List[Dict[str, Any]], user_answers: List[str]) -> tuple:
-    """
-    Generate prompts for evaluating student answers.
-
-    Args:
-        questions: List of question dictionaries
-        user_answers: List of user's answers
-
-    Returns:
-        Tuple of (system_prompt, user_prompt)
-    """
-    system_prompt = """You are a patient English teacher responsible for evaluating student performance and providing constructive feedback. You must return valid JSON format only."""
-
-    # Format questions and answers
-    qa_pairs = []
-    for i, (q, ans) in enumerate(zip(questions, user_answers), 1):
-        qa_pairs.append(f"""Question {i} ({q['type']}):
-Q: {q['question']}
-Correct Answer: {q['correct_answer']}
-Student Answer: {ans}
-""")
+_SYSTEM_PROMPT = """You are a patient English teacher responsible for evaluating student performance and providing constructive feedback. You must return valid JSON format only."""
 
-    qa_text = "\n".join(qa_pairs)
+# One question/answer block of the evaluation prompt
+_QUESTION_TMPL = "Question {n} ({type}):\nQ: {q}\nCorrect Answer: {ca}\n"
+_QA_TMPL = _QUESTION_TMPL + "Student Answer: {a}\n"
 
-    user_prompt = f"""Please evaluate the following answers:
+_EVALUATION_TEMPLATE = Template("""Please evaluate the following answers:
 
-{qa_text}
+$qa_text
 
 Requirements:
 1. Give a total score (out of 100)
@@ -40,19 +23,110 @@ Requirements:
 4. Provide learning suggestions
 
 Return in JSON format:
-{{
+{
   "score": 80,
   "item_analysis": [
-    {{
+    {
       "question_num": 1,
       "correct": true,
       "feedback": "explanation"
-    }}
+    }
   ],
   "overall_feedback": "overall evaluation",
   "suggestions": "learning suggestions"
-}}
+}
+
+IMPORTANT: Return ONLY valid JSON, no other text.""")
+
+_BATCH_EVALUATION_TEMPLATE = Template("""Please evaluate $item_count students' answers to the following questions:
+
+$questions_text
+
+Student answers:
+
+$items_text
+
+Requirements:
+1. Evaluate every ITEM independently
+2. For each ITEM give a total score (out of 100)
+3. Analyze each question (correct/incorrect) and explain why answers are wrong
+4. Provide learning suggestions
+
+Return in JSON format, with exactly one entry in "results" per ITEM, in ITEM order:
+{
+  "results": [
+    {
+      "item": 1,
+      "score": 80,
+      "item_analysis": [
+        {
+          "question_num": 1,
+          "correct": true,
+          "feedback": "explanation"
+        }
+      ],
+      "overall_feedback": "overall evaluation",
+      "suggestions": "learning suggestions"
+    }
+  ]
+}
+
+IMPORTANT: Return ONLY valid JSON, no other text.""")
+
+
+def get_evaluation_prompt(questions: List[Dict[str, Any]], user_answers: List[str]) -> tuple:
+    """
+    Generate prompts for evaluating student answers.
+
+    Args:
+        questions: List of question dictionaries
+        user_answers: List of user's answers
+
+    Returns:
+        Tuple of (system_prompt, user_prompt)
+    """
+    # Format questions and answers
+    qa_text = "\n".join(
+        _QA_TMPL.format(n=i, type=q['type'], q=q['question'], ca=q['correct_answer'], a=ans)
+        for i, (q, ans) in enumerate(zip(questions, user_answers), 1)
+    )
+
+    user_prompt = _EVALUATION_TEMPLATE.safe_substitute(qa_text=qa_text)
+
+    return _SYSTEM_PROMPT, user_prompt
+
+
+def get_batch_evaluation_prompt(questions: List[Dict[str, Any]], answers_matrix: List[List[str]]) -> tuple:
+    """
+    Generate prompts for evaluating several students' answers to the same questions in one call.
+
+    Args:
+        questions: List of question dictionaries
+        answers_matrix: One list of answers per test session
+
+    Returns:
+        Tuple of (system_prompt, user_prompt)
+    """
+    # Questions are shared by every item, so list them once
+    questions_text = "\n".join(
+        _QUESTION_TMPL.format(n=i, type=q['type'], q=q['question'], ca=q['correct_answer'])
+        for i, q in enumerate(questions, 1)
+    )
+
+    # Format each test session under its own numbered delimiter
+    items = []
+    for k, answers in enumerate(answers_matrix, 1):
+        answer_lines = "\n".join(
+            f"Question {i} Student Answer: {ans}" for i, ans in enumerate(answers, 1)
+        )
+        items.append(f"### ITEM {k}\n{answer_lines}\n")
+
+    items_text = "\n".join(items)
 
-IMPORTANT: Return ONLY valid JSON, no other text."""
+    user_prompt = _BATCH_EVALUATION_TEMPLATE.safe_substitute(
+        item_count=len(answers_matrix),
+        questions_text=questions_text,
+        items_text=items_text,
+    )
 
-    return system_prompt, user_prompt
+    return _SYSTEM_PROMPT, user_prompt